@@ -4,6 +4,7 @@
 
 #> Imports
 import re
+import sys
 import codecs
 import struct
 from types import SimpleNamespace
@@ -74,7 +75,7 @@ def compile_expression(bm: SimpleBufferMatcher, *, _stop: bytes = CHARS.statemen
         bm.match(PATTERNS.discard)
         # pre-nodes
         if (m := bm.match(PATTERNS.named)) is not None:
-            name = m.group(1).decode()
+            name = sys.intern(m.group(1).decode())
             bm.match(PATTERNS.discard)
         else: name = None
         if (m := bm.match(PATTERNS.noderange)) is not None:
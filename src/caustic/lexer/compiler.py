@@ -4,6 +4,7 @@
 
 #> Imports
 import re
+import sys
 import codecs
 import struct
 import typing
@@ -22,15 +23,17 @@ __all__ = ('Compiler',)
 
 class Compiler:
     '''Compiles grammars'''
-    __slots__ = ('grammar', 'base_path')
+    __slots__ = ('grammar', 'base_path', 'pattern_cache')
 
     grammar: dict[bytes, nodes.Node]
     base_path: Path
+    pattern_cache: dict[tuple[bytes, bytes], re.Pattern]
 
     def __init__(self, grammar: dict[bytes, nodes.Node],
                  base_path: Path = Path(__file__).parent):
         self.grammar = grammar
         self.base_path = base_path
+        self.pattern_cache = {}
 
     # Compiling
     @singledispatchmethod
@@ -86,20 +89,23 @@ class Compiler:
             Also handles pragmas
         '''
         working = {}
+        comment = self.grammar[b'COMMENT']
+        pragma = self.grammar[b'PRAGMA']
+        statement = self.grammar[b'STATEMENT']
         while True:
             # Discard junk characters and check for EOF
-            while bm.match(util.WHITESPACE_PATT) or self.grammar[b'COMMENT'](bm):
+            while bm.match(util.WHITESPACE_PATT) or comment(bm):
                 pass # ignore whitespace and comments
             if not bm.peek(1): break # EOF
             # Handle pragmas
-            if p := self.grammar[b'PRAGMA'](bm):
+            if p := pragma(bm):
                 try: self.handle_pragma(p['type'], p['args'], working=working, bm=bm, source=source)
                 except Exception as e:
                     e.add_note(f'In pragma at {bm.pos} ({bm.lno}:{bm.cno})')
                     raise e
                 continue
             # Parse statements
-            stmt = self.grammar[b'STATEMENT'](bm, stealer=True)
+            stmt = statement(bm, stealer=True)
             working[stmt['name']] = stmt['expr']
         return working
     ### Pragma
@@ -133,37 +139,61 @@ class Compiler:
     def compile_expr(self, name: bytes, expr: dict) -> nodes.Node:
         '''Compiles a node's expression and names it'''
         node = self.compile_node(**expr)
-        node.name = None if name is None else name.decode()
+        node.name = None if name is None else sys.intern(name.decode())
         return node
 
     def compile_node(self, type: bytes, val: dict | bytes | None = None) -> nodes.Node:
         '''Compiles a node's expression'''
-        match type:
-            case b'group' | b'group_ws_sensitive' | b'union':
-                subnodes = tuple(self.compile_expr(**expr) for expr in val)
-                if type == b'union':
-                    return nodes.NodeUnion(*subnodes)
-                return nodes.NodeGroup(*subnodes, keep_whitespace=(type == b'group_ws_sensitive'))
-            case b'range' | b'range_ws_sensitive':
-                return nodes.NodeRange(node=self.compile_expr(**val['node']),
-                    min=int(val['min'] or 0), max=(None if val['max'] is None else int(val['max'])),
-                    keep_whitespace=(type == b'range_ws_sensitive'))
-            case b'string':
-                return nodes.StringNode(escape_decode(val)[0])
-            case b'pattern':
-                flags = re.NOFLAG
-                for f in struct.unpack(f'{len(val["flags"])}c', val['flags']): # iterate through bytes
-                    flag = RE_FLAGS.get(f, None)
-                    if flag is None:
-                        raise ValueError(f'Unknown regular expression flag {f!r}')
-                    flags |= flag
-                return nodes.PatternNode(re.compile(val['pattern'], flags),
-                                         None if val['group'] is None else int(val['group']))
-            case b'stealer':
-                return nodes.Stealer()
-            case b'context':
-                return nodes.Context(escape_decode(val['str'])[0] if 'str' in val else val['raw'])
-            case b'noderef':
-                return nodes.NodeRef(val)
-            case _:
-                raise TypeError(f'Unknown node type {type!r}')
+        if (compiler := self.NODE_COMPILERS.get(type)) is None:
+            raise TypeError(f'Unknown node type {type!r}')
+        return getattr(self, compiler)(type, val)
+
+    ### Node types
+    def compile_node_group(self, type: bytes, val: list[dict]) -> nodes.NodeGroup | nodes.NodeUnion:
+        '''Compiles a node group (`group` or `group_ws_sensitive`) or union (`union`)'''
+        subnodes = tuple(self.compile_expr(**expr) for expr in val)
+        if type == b'union':
+            return nodes.NodeUnion(*subnodes)
+        return nodes.NodeGroup(*subnodes, keep_whitespace=(type == b'group_ws_sensitive'))
+    def compile_node_range(self, type: bytes, val: dict) -> nodes.NodeRange:
+        '''Compiles a node range (`range` or `range_ws_sensitive`)'''
+        return nodes.NodeRange(node=self.compile_expr(**val['node']),
+            min=int(val['min'] or 0), max=(None if val['max'] is None else int(val['max'])),
+            keep_whitespace=(type == b'range_ws_sensitive'))
+    def compile_node_string(self, type: bytes, val: bytes) -> nodes.StringNode:
+        '''Compiles a string node (`string`)'''
+        return nodes.StringNode(escape_decode(val)[0])
+    def compile_node_pattern(self, type: bytes, val: dict) -> nodes.PatternNode:
+        '''Compiles a pattern node (`pattern`)'''
+        # patterns are shared between nodes with the same source and flags,
+        #  so that each one is only parsed and compiled once
+        key = (val['pattern'], val['flags'])
+        if (patt := self.pattern_cache.get(key)) is None:
+            flags = re.NOFLAG
+            for f in struct.unpack(f'{len(val["flags"])}c', val['flags']): # iterate through bytes
+                flag = RE_FLAGS.get(f, None)
+                if flag is None:
+                    raise ValueError(f'Unknown regular expression flag {f!r}')
+                flags |= flag
+            patt = self.pattern_cache[key] = re.compile(val['pattern'], flags)
+        return nodes.PatternNode(patt, None if val['group'] is None else int(val['group']))
+    def compile_node_stealer(self, type: bytes, val: None) -> nodes.Stealer:
+        '''Compiles a stealer node (`stealer`)'''
+        return nodes.Stealer()
+    def compile_node_context(self, type: bytes, val: dict) -> nodes.Context:
+        '''Compiles a context node (`context`)'''
+        return nodes.Context(escape_decode(val['str'])[0] if 'str' in val else val['raw'])
+    def compile_node_noderef(self, type: bytes, val: bytes) -> nodes.NodeRef:
+        '''Compiles a node reference (`noderef`)'''
+        return nodes.NodeRef(val)
+
+    # maps node types to method names, so that subclasses can override the methods
+    NODE_COMPILERS: dict[bytes, str] = {
+        b'group': 'compile_node_group', b'group_ws_sensitive': 'compile_node_group', b'union': 'compile_node_group',
+        b'range': 'compile_node_range', b'range_ws_sensitive': 'compile_node_range',
+        b'string': 'compile_node_string',
+        b'pattern': 'compile_node_pattern',
+        b'stealer': 'compile_node_stealer',
+        b'context': 'compile_node_context',
+        b'noderef': 'compile_node_noderef',
+    }
@@ -6,12 +6,14 @@
 import io
 import re
 import typing
-from abc import ABCMeta, abstractmethod
+from abc import abstractmethod, update_abstractmethods
 from buffer_matcher import SimpleBufferMatcher
 from collections import abc as cabc
 
 from .util import WHITESPACE_PATT
 from .util import NO_MATCH
+from .util import WHITESPACE_BYTES
+from .util import pattern_first_bytes
 #</Imports
 
 #> Header >/
@@ -20,6 +22,10 @@ __all__ = ('NodeSyntaxError',
            'StringNode', 'PatternNode',
            'Stealer', 'Context', 'NodeRef')
 
+# matched against the whole buffer with a start position (rather than a slice of its view),
+#  which is only safe for `WHITESPACE_PATT` since it has no anchors or lookbehinds
+_match_whitespace = WHITESPACE_PATT.match
+
 # Exceptions
 class NodeSyntaxError(SyntaxError):
     '''For when nodes fail to match something that must be matched'''
@@ -46,7 +52,7 @@ class NodeSyntaxError(SyntaxError):
             return sio.getvalue()
 # Nodes
 ## Base
-class Node(metaclass=ABCMeta):
+class Node:
     '''The base class for all nodes'''
     __slots__ = ('name',)
 
@@ -55,6 +61,13 @@ class Node(metaclass=ABCMeta):
     def __init__(self, *, name: str | None = None):
         self.name = name
 
+    # abstract methods are tracked without `ABCMeta`,
+    #  so that `isinstance()` checks against nodes don't go through its hooks
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.__abstractmethods__ = frozenset()
+        update_abstractmethods(cls)
+
     def bind(self, nodes: dict[bytes, typing.Self]) -> None:
         '''Binds all sub-nodes, if possible'''
         if not hasattr(self, 'nodes'): return
@@ -64,14 +77,39 @@ class Node(metaclass=ABCMeta):
         if not hasattr(self, 'nodes'): return
         for node in self.nodes: node.unbind()
 
+    def prepare(self) -> None:
+        '''
+            Precomputes this node's private (`_`-prefixed) attributes from its public ones
+            This is called on initialization and unpickling,
+                and should be called again if public attributes are changed afterwards
+        '''
+    def first_bytes(self) -> frozenset[int] | None:
+        '''
+            Returns the set of bytes that this node's match could start with,
+                or `None` if that is unknown or if this node could match without consuming anything
+        '''
+        return None
+
+    # Private attributes are derived by `.prepare()`, and so are not pickled
+    def __getstate__(self) -> tuple[dict[str, typing.Any] | None, dict[str, typing.Any]]:
+        return (getattr(self, '__dict__', None),
+                {a: getattr(self, a) for c in type(self).__mro__ for a in vars(c).get('__slots__', ())
+                 if (not a.startswith('_')) and hasattr(self, a)})
+    def __setstate__(self, state: tuple[dict[str, typing.Any] | None, dict[str, typing.Any]]) -> None:
+        if state[0] is not None: self.__dict__.update(state[0])
+        for a,v in state[1].items(): setattr(self, a, v)
+        self.prepare()
+
     @abstractmethod
-    def __call__(self, bm: SimpleBufferMatcher, *, stealer: bool = False) -> object | dict[str, typing.Any]:
+    def __call__(self, bm: SimpleBufferMatcher, stealer: bool = False) -> object | dict[str, typing.Any]:
         '''Executes this node on `data`'''
 
     @abstractmethod
     def __str__(self) -> str: pass
     @abstractmethod
     def __repr__(self) -> str: pass
+Node.__abstractmethods__ = frozenset()
+update_abstractmethods(Node)
 
 ## Groups
 class NodeGroup(Node):
@@ -79,38 +117,56 @@ class NodeGroup(Node):
         A group of nodes
         Discards whitespace between nodes if `keep_whitespace` is false
     '''
-    __slots__ = ('nodes', 'keep_whitespace')
+    __slots__ = ('nodes', 'keep_whitespace', '_steps')
 
     nodes: tuple[Node, ...]
     keep_whitespace: bool
+    _steps: tuple[tuple[int, Node | None, bool], ...]
 
     def __init__(self, *nodes: Node, keep_whitespace: bool = False, **kwargs):
         super().__init__(**kwargs)
         self.nodes = nodes
         self.keep_whitespace = keep_whitespace
+        self.prepare()
 
-    def __call__(self, bm: SimpleBufferMatcher, stealer: bool = False) -> object | dict[str, typing.Any] | list[typing.Any] | None:
-        save = bm.save_pos()
-        results = []
-        single_result = False
-        after = None
+    def prepare(self) -> None:
+        '''
+            Precomputes `._steps` from `.nodes`,
+                a tuple of `(index, node, is_after_stealer)` for each node,
+                where `node` is `None` for stealers
+        '''
+        steps = []
+        after_stealer = False
         for i,n in enumerate(self.nodes):
-            if not self.keep_whitespace:
-                bm.match(WHITESPACE_PATT)
             if isinstance(n, Stealer):
                 if not i:
                     se = SyntaxError('Cannot have a stealer at the beginning of a group')
                     se.add_note(str(self))
                     raise se
-                stealer = True
-                after = self.nodes[-1]
+                after_stealer = True
+                steps.append((i, None, True))
                 continue
+            steps.append((i, n, after_stealer))
+        self._steps = tuple(steps)
+    def first_bytes(self) -> frozenset[int] | None:
+        if not self._steps: return None
+        if (first := self._steps[0][1].first_bytes()) is None: return None
+        return first if self.keep_whitespace else (first | WHITESPACE_BYTES)
+
+    def __call__(self, bm: SimpleBufferMatcher, stealer: bool = False) -> object | dict[str, typing.Any] | list[typing.Any] | None:
+        save = bm.save_pos()
+        results = []
+        single_result = False
+        for i,n,after_stealer in self._steps:
+            if (not self.keep_whitespace) and ((m := _match_whitespace(bm.data, bm.pos)) is not None):
+                bm.pos = m.end()
+            if n is None: continue # stealer
             # Execute node
-            try: res = n(bm, stealer=stealer)
+            try: res = n(bm, stealer or after_stealer)
             except NodeSyntaxError as nse:
                 raise NodeSyntaxError(self, bm, f'Node {i} failed underneath node-group') from nse
             if res is NO_MATCH:
-                assert not stealer
+                assert not (stealer or after_stealer)
                 bm.load_pos(save)
                 return NO_MATCH
             # Check how we should return results
@@ -166,19 +222,88 @@ class NodeGroup(Node):
         return f'<{type(self).__qualname__} {self.name!r}{" [keep_whitespace]" if self.keep_whitespace else ""} {self.nodes!r}>'
 
 class NodeUnion(Node):
-    '''Matches any of its nodes'''
-    __slots__ = ('nodes',)
+    '''
+        Matches any of its nodes
+        If all of its nodes are `PatternNode`s with a group,
+            they are fused into a single pattern,
+            otherwise nodes that cannot start with the next byte are skipped
+    '''
+    __slots__ = ('nodes', '_fused_match', '_fused_groups', '_by_first_byte')
 
     nodes: tuple[Node, ...]
+    _fused_match: cabc.Callable[[memoryview], re.Match | None] | None
+    _fused_groups: dict[int, int] | None
+    _by_first_byte: tuple[tuple[Node, ...], ...] | None
+
+    # group references would be renumbered by fusing, so patterns with them are left alone
+    _UNFUSABLE_PATT = re.compile(rb'\\[1-9]|\(\?\(|\(\?P=')
 
     def __init__(self, *nodes: Node, **kwargs):
         super().__init__(**kwargs)
         self.nodes = nodes
+        self.prepare()
 
-    def __call__(self, bm: SimpleBufferMatcher, *, stealer: bool = False) -> object | dict[str, typing.Any]:
+    def prepare(self) -> None:
+        '''
+            Fuses `.nodes` into `._fused_match`, if possible
+            The fused pattern is an alternation of each node's pattern in a capturing group,
+                and `._fused_groups` maps each of those groups to the group its node returns
+            Otherwise, builds `._by_first_byte`, which maps each byte (and 256 for EOF)
+                to the nodes that could match starting with it, in order
+        '''
+        self._fused_match = self._fused_groups = self._by_first_byte = None
+        if not self.nodes: return
+        if not self._fuse(): self._build_first_byte_table()
+    def _fuse(self) -> bool:
+        '''Sets `._fused_match` and `._fused_groups`, returning whether fusing was possible'''
+        parts = []
+        groups = {}
+        offset = 1
         for n in self.nodes:
-            if (res := n(bm)) is not NO_MATCH:
-                return res
+            if (type(n) is not PatternNode) or (n.group is None): return False
+            patt = n.pattern
+            if (not isinstance(patt.pattern, bytes)) or patt.groupindex \
+                    or not (0 <= n.group <= patt.groups) \
+                    or (patt.flags & ~(re.IGNORECASE | re.MULTILINE | re.DOTALL)) \
+                    or self._UNFUSABLE_PATT.search(patt.pattern):
+                return False
+            flags = ''.join(f for f,v in PatternNode.FLAGS.items() if v & patt.flags)
+            parts.append(b'((?' + flags.encode() + b':' + patt.pattern + b'))')
+            groups[offset] = offset + n.group
+            offset += 1 + patt.groups
+        try: fused = re.compile(b'|'.join(parts))
+        except re.error: return False
+        self._fused_match = fused.match
+        self._fused_groups = groups
+        return True
+    def _build_first_byte_table(self) -> None:
+        '''Sets `._by_first_byte`, if any of `.nodes` have known first bytes'''
+        firsts = tuple(n.first_bytes() for n in self.nodes)
+        if all(f is None for f in firsts): return
+        candidates = {} # share identical tuples between bytes
+        table = []
+        for c in range(257): # 256 is EOF, which only nodes with unknown first bytes could match
+            cand = tuple(n for n,f in zip(self.nodes, firsts) if (f is None) or (c in f))
+            table.append(candidates.setdefault(cand, cand))
+        self._by_first_byte = tuple(table)
+    def first_bytes(self) -> frozenset[int] | None:
+        first = frozenset()
+        for n in self.nodes:
+            if (f := n.first_bytes()) is None: return None
+            first |= f
+        return first or None
+
+    def __call__(self, bm: SimpleBufferMatcher, stealer: bool = False) -> object | dict[str, typing.Any]:
+        if self._fused_match is not None:
+            if (m := self._fused_match(bm.view[bm.pos:])) is not None:
+                bm.pos += m.end()
+                return m.group(self._fused_groups[m.lastindex])
+        else:
+            if self._by_first_byte is None: nodes = self.nodes
+            else: nodes = self._by_first_byte[bm.data[bm.pos] if bm.pos < bm.len else 256]
+            for n in nodes:
+                if (res := n(bm)) is not NO_MATCH:
+                    return res
         if stealer: raise NodeSyntaxError(self, bm, f'Expected union {self}')
         return NO_MATCH
 
@@ -212,30 +337,33 @@ class NodeRange(Node):
         '''Binds the underlying node, if applicable'''
         return self.node.bind(nodes)
 
-    def __call__(self, bm: SimpleBufferMatcher, *, stealer: bool = False) -> object | list[typing.Any]:
+    def first_bytes(self) -> frozenset[int] | None:
+        return self.node.first_bytes() if self.min else None
+
+    def __call__(self, bm: SimpleBufferMatcher, stealer: bool = False) -> object | list[typing.Any]:
         results = []
         save = bm.save_pos()
         for _ in range(self.min):
-            try: results.append(self.node(bm, stealer=stealer))
+            try: results.append(self.node(bm, stealer))
             except NodeSyntaxError as nse:
                 raise NodeSyntaxError(self, bm, f'Expected at least {self.min} of {self.node}') from nse
             if results[-1] is NO_MATCH:
                 bm.load_pos(save)
                 return NO_MATCH
-            if not self.keep_whitespace:
-                bm.match(WHITESPACE_PATT)
+            if (not self.keep_whitespace) and ((m := _match_whitespace(bm.data, bm.pos)) is not None):
+                bm.pos = m.end()
         if self.max is None:
             while (res := self.node(bm)) is not NO_MATCH:
                 results.append(res)
-                if not self.keep_whitespace:
-                    bm.match(WHITESPACE_PATT)
+                if (not self.keep_whitespace) and ((m := _match_whitespace(bm.data, bm.pos)) is not None):
+                    bm.pos = m.end()
         else:
             for _ in range(self.min, self.max):
                 res = self.node(bm)
                 if res is NO_MATCH: break
                 results.append(res)
-                if not self.keep_whitespace:
-                    bm.match(WHITESPACE_PATT)
+                if (not self.keep_whitespace) and ((m := _match_whitespace(bm.data, bm.pos)) is not None):
+                    bm.pos = m.end()
         return results
 
     def __str__(self) -> str:
@@ -256,8 +384,13 @@ class StringNode(Node):
         if not self.string:
             raise ValueError('Cannot use an empty string')
 
-    def __call__(self, bm: SimpleBufferMatcher, *, stealer: bool = False) -> object | bytes:
-        if bm.match(self.string):
+    def first_bytes(self) -> frozenset[int] | None:
+        return frozenset((self.string[0],))
+
+    def __call__(self, bm: SimpleBufferMatcher, stealer: bool = False) -> object | bytes:
+        # equivalent to `bm.match(self.string)`, but skips its type dispatch and peeking
+        if bm.data.startswith(self.string, bm.pos):
+            bm.pos += len(self.string)
             return self.string
         if stealer:
             raise NodeSyntaxError(self, bm, f'Expected string {self}')
@@ -269,18 +402,28 @@ class StringNode(Node):
         return f'<{type(self).__qualname__} {self.name!r} {self.string!r}>'
 class PatternNode(Node):
     '''Matches a pattern (regular expression)'''
-    __slots__ = ('pattern', 'group')
+    __slots__ = ('pattern', 'group', '_match')
 
     group: int | None
     pattern: re.Pattern
+    _match: cabc.Callable[[memoryview], re.Match | None]
 
     def __init__(self, pattern: re.Pattern, group: int | None = None, **kwargs):
         super().__init__(**kwargs)
         self.pattern = pattern
         self.group = group
-
-    def __call__(self, bm: SimpleBufferMatcher, *, stealer: bool = False) -> object | re.Match | bytes:
-        if (m := bm.match(self.pattern)) is not None:
+        self.prepare()
+
+    def prepare(self) -> None:
+        '''Caches `.pattern.match()` as `._match`'''
+        self._match = self.pattern.match
+    def first_bytes(self) -> frozenset[int] | None:
+        return pattern_first_bytes(self.pattern)
+
+    def __call__(self, bm: SimpleBufferMatcher, stealer: bool = False) -> object | re.Match | bytes:
+        # equivalent to `bm.match(self.pattern)`, but skips its type dispatch and seeking
+        if (m := self._match(bm.view[bm.pos:])) is not None:
+            bm.pos += m.end()
             return m.group(self.group) if self.group is not None else m
         if stealer:
             raise NodeSyntaxError(self, bm, f'Expected pattern {self}')
@@ -316,7 +459,7 @@ class Context(Node):
         super().__init__(**kwargs)
         self.val = val
 
-    def __call__(self, bm: SimpleBufferMatcher, *, stealer: bool = False) -> typing.Any:
+    def __call__(self, bm: SimpleBufferMatcher, stealer: bool = False) -> typing.Any:
         return self.val
 
     def __str__(self) -> str:
@@ -351,10 +494,10 @@ class NodeRef(Node):
         '''Unbinds this node'''
         self.target = None
 
-    def __call__(self, bm: SimpleBufferMatcher, *, stealer: bool = False) -> typing.Any:
-        if not self.bound:
+    def __call__(self, bm: SimpleBufferMatcher, stealer: bool = False) -> typing.Any:
+        if (target := self.target) is None: # inlined `.bound`
             raise TypeError(f'Cannot call an unbound NodeRef (node target {self.target_name} was never bound)')
-        try: return self.target(bm, stealer)
+        try: return target(bm, stealer)
         except NodeSyntaxError as nse:
             nse.add_note(f'Under reference {self}')
             raise nse
@@ -7,6 +7,7 @@
 
 #> Imports
 import io
+import zlib
 import pickle
 import typing
 import pickletools
@@ -25,29 +26,34 @@ class NodePickler(pickle.Pickler):
     '''Pickles nodes, using `.persistent_id()` for node class names'''
     __slots__ = ()
 
+    NODE_IDS: dict[type[nodes.Node], int] = {
+        t: i for i,t in enumerate(map(nodes.__dict__.__getitem__, nodes.__all__))
+        if isinstance(t, type) and issubclass(t, nodes.Node)}
+
     def persistent_id(self, obj: typing.Any) -> int | None:
-        if isinstance(obj, type) and issubclass(obj, nodes.Node):
-            try:
-                return nodes.__all__.index(obj.__name__)
-            except ValueError:
-                return None
+        if isinstance(obj, type):
+            return self.NODE_IDS.get(obj)
         return None
 class NodeUnpickler(pickle.Unpickler):
     '''Unpickles nodes from `NodePickler`, using `.persistent_load()` for node class names'''
     __slots__ = ()
 
+    NODE_TYPES: tuple[type, ...] = tuple(map(nodes.__dict__.__getitem__, nodes.__all__))
+
     def persistent_load(self, pid: int) -> type[nodes.Node]:
         if not isinstance(pid, int):
             raise pickle.UnpicklingError(f'Persistent node ID should be an int')
-        try: return getattr(nodes, nodes.__all__[pid])
+        try: return self.NODE_TYPES[pid]
         except IndexError:
             raise pickle.UnpicklingError(f'Persistent node ID is invalid')
 
 # Functions
 ## Serialization
-def serialize(nodes: dict[bytes, nodes.Node], *, optimize: bool = True) -> bytes:
+def serialize(nodes: dict[bytes, nodes.Node], *, optimize: bool = True, compress: bool = False) -> bytes:
     '''
         Serializes `nodes`
+        If `compress`, then the result is compressed with `zlib`
+            (this is detected automatically by `deserialize()`)
         Note: all nodes are unbound; if they are used
             elsewhere this will cause side-effects
     '''
@@ -55,6 +61,7 @@ def serialize(nodes: dict[bytes, nodes.Node], *, optimize: bool = True) -> bytes
         serialize_to(nodes, bio)
         data = bio.getvalue()
     if optimize: data = pickletools.optimize(data)
+    if compress: data = zlib.compress(data, 9)
     return data
 def serialize_to(nodes: dict[bytes, nodes.Node], to: typing.BinaryIO) -> None:
     '''
@@ -67,12 +74,33 @@ def serialize_to(nodes: dict[bytes, nodes.Node], to: typing.BinaryIO) -> None:
     p.dump(tuple(nodes.items()))
 ## Deserialization
 def deserialize(data: bytes, *, bind: bool = True) -> dict[bytes, nodes.Node]:
-    '''Deserializes nodes from `data`'''
+    '''
+        Deserializes nodes from `data`
+        `data` may be compressed (see `serialize()`)
+    '''
+    if data[:1] == b'\x78': # zlib header; not a valid pickle opcode
+        data = zlib.decompress(data)
     with io.BytesIO(data) as bio:
         return deserialize_from(bio, bind=bind)
 def deserialize_from(from_: typing.BinaryIO, *, bind: bool = True) -> dict[bytes, nodes.Node]:
-    '''Deserializes nodes from a file-like object'''
+    '''
+        Deserializes nodes from a file-like object
+        Compressed data (see `serialize()`) is only detected if `from_` has a `.peek()` method
+            (such as buffered files); data after the nodes is left unread either way
+    '''
+    if (peek := getattr(from_, 'peek', None)) is not None and peek(1)[:1] == b'\x78':
+        from_ = io.BytesIO(_decompress_from(from_))
     nup = NodeUnpickler(from_)
     nodes = dict(nup.load())
     if bind: bind_nodes(nodes)
     return nodes
+def _decompress_from(from_: typing.BinaryIO) -> bytes:
+    '''Decompresses a zlib stream from a peekable file-like object, without reading past its end'''
+    dec = zlib.decompressobj()
+    out = []
+    while not dec.eof:
+        if not (chunk := from_.peek(1)):
+            raise EOFError('Compressed data ended before the end of the zlib stream')
+        out.append(dec.decompress(chunk))
+        from_.read(len(chunk) - len(dec.unused_data))
+    return b''.join(out)
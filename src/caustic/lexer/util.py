@@ -7,14 +7,20 @@ import re
 import typing
 
 from . import nodes
+
+try: # private modules, only used for `pattern_first_bytes()`
+    from re import _parser as re_parser, _constants as re_consts
+except ImportError:
+    re_parser = re_consts = None
 #</Imports
 
 #> Header >/
-__all__ = ('WHITESPACE_PATT', 'NO_MATCH',
-           'bind_nodes')
+__all__ = ('WHITESPACE_PATT', 'WHITESPACE_BYTES', 'NO_MATCH',
+           'bind_nodes', 'pattern_first_bytes')
 
 # Constants
 WHITESPACE_PATT = re.compile(rb'\s+')
+WHITESPACE_BYTES = frozenset(b' \t\n\r\f\v') # bytes matched by `WHITESPACE_PATT`
 
 class NoMatchType:
     __slots__ = ()
@@ -32,3 +38,83 @@ del NoMatchType
 def bind_nodes(nodes: dict[bytes, 'nodes.Node']) -> None:
     '''Cross-binds all nodes'''
     for node in nodes.values(): node.bind(nodes)
+
+## Pattern analysis
+_ALL_BYTES = frozenset(range(256))
+if re_consts is not None:
+    try:
+        _CATEGORY_BYTES = {
+            re_consts.CATEGORY_DIGIT: frozenset(b'0123456789'),
+            re_consts.CATEGORY_SPACE: WHITESPACE_BYTES,
+            re_consts.CATEGORY_WORD: frozenset(b'0123456789_abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'),
+        }
+        _CATEGORY_BYTES |= {
+            re_consts.CATEGORY_NOT_DIGIT: _ALL_BYTES - _CATEGORY_BYTES[re_consts.CATEGORY_DIGIT],
+            re_consts.CATEGORY_NOT_SPACE: _ALL_BYTES - _CATEGORY_BYTES[re_consts.CATEGORY_SPACE],
+            re_consts.CATEGORY_NOT_WORD: _ALL_BYTES - _CATEGORY_BYTES[re_consts.CATEGORY_WORD],
+        }
+    except AttributeError: # parser internals changed
+        re_parser = re_consts = None
+
+def pattern_first_bytes(patt: re.Pattern) -> frozenset[int] | None:
+    '''
+        Returns the set of bytes that a match of `patt` could start with,
+            or `None` if that cannot be determined or if `patt` could match an empty string
+        The set may contain bytes that can never actually start a match, but never misses any
+        Always returns `None` if `re`'s private parser modules are unavailable
+    '''
+    if re_parser is None: return None
+    if (not isinstance(patt.pattern, bytes)) or (patt.flags & (re.LOCALE | re.VERBOSE)): return None
+    try: first = _seq_first_bytes(re_parser.parse(patt.pattern, patt.flags))
+    except (re.error, TypeError, ValueError, KeyError, AttributeError): return None
+    if (first is None) or first[1]: return None
+    if patt.flags & re.IGNORECASE:
+        return frozenset(first[0] | {c for b in first[0] for c in bytes((b,)).swapcase()})
+    return frozenset(first[0])
+def _seq_first_bytes(seq: typing.Iterable[tuple]) -> tuple[frozenset[int], bool] | None:
+    '''Returns the first bytes of a parsed sequence, and whether it can be empty'''
+    first = frozenset()
+    for op,av in seq:
+        if (res := _item_first_bytes(op, av)) is None: return None
+        first |= res[0]
+        if not res[1]: return (first, False)
+    return (first, True)
+def _item_first_bytes(op: object, av: typing.Any) -> tuple[frozenset[int], bool] | None:
+    '''Returns the first bytes of a parsed item, and whether it can be empty'''
+    match op:
+        case re_consts.LITERAL:
+            return (frozenset((av,)), False)
+        case re_consts.NOT_LITERAL:
+            return (_ALL_BYTES - {av}, False)
+        case re_consts.ANY:
+            return (_ALL_BYTES, False)
+        case re_consts.IN:
+            first = set()
+            negate = False
+            for iop,iav in av:
+                match iop:
+                    case re_consts.NEGATE: negate = True
+                    case re_consts.LITERAL: first.add(iav)
+                    case re_consts.RANGE: first.update(range(iav[0], iav[1]+1))
+                    case re_consts.CATEGORY: first |= _CATEGORY_BYTES[iav]
+                    case _: return None
+            return ((_ALL_BYTES - first) if negate else frozenset(first), False)
+        case re_consts.SUBPATTERN:
+            if av[1] or av[2]: return None # scoped flags
+            return _seq_first_bytes(av[3])
+        case re_consts.ATOMIC_GROUP:
+            return _seq_first_bytes(av)
+        case re_consts.BRANCH:
+            first = frozenset()
+            empty = False
+            for branch in av[1]:
+                if (res := _seq_first_bytes(branch)) is None: return None
+                first |= res[0]
+                empty |= res[1]
+            return (first, empty)
+        case re_consts.MAX_REPEAT | re_consts.MIN_REPEAT | re_consts.POSSESSIVE_REPEAT:
+            if (res := _seq_first_bytes(av[2])) is None: return None
+            return (res[0], res[1] or not av[0])
+        case re_consts.AT | re_consts.ASSERT | re_consts.ASSERT_NOT:
+            return (frozenset(), True) # zero-width
+    return None